@@ -0,0 +1,147 @@
+"""Motor de cenários (what-if) da matriz avaliativa.
+
+Recalcula as pontuações por bloco e os totais a partir da matriz de
+pontuações por atividade (região × atividade), para um ou milhares de
+vetores de pesos de uma só vez, com operações matriciais do NumPy. Também
+estima a sensibilidade do ranking dos Ceasas por simulação de Monte Carlo.
+"""
+import numpy as np
+
+
+def montar_matriz(df_blocos, maximos_atividade):
+    """Organiza os dados extraídos em arrays para o motor de cenários.
+
+    ``df_blocos`` é a saída de ``extrair_dados`` e ``maximos_atividade`` é um
+    dicionário com a pontuação máxima de cada atividade, pelo nome, na ordem
+    da planilha. Blocos e atividades seguem essa ordem, mesmo que algum bloco
+    falte para uma região. Pontuações de atividade ausentes contam como zero;
+    a diferença para a ``Pontuação no Bloco`` da planilha é guardada em
+    ``ajustes`` (ver ``divergencias``).
+    """
+    atividades_por_bloco = {}
+    for bloco, atividades in zip(df_blocos['Bloco'], df_blocos['Atividades']):
+        atividades_por_bloco.setdefault(bloco, list(atividades))
+    ordem = {atividade: i for i, atividade in enumerate(maximos_atividade)}
+    blocos = sorted(
+        atividades_por_bloco, key=lambda b: min(ordem.get(a, len(ordem)) for a in atividades_por_bloco[b])
+    )
+    atividades = [a for bloco in blocos for a in atividades_por_bloco[bloco]]
+    limites = np.cumsum([0] + [len(atividades_por_bloco[b]) for b in blocos])
+
+    # Matriz de pertinência atividade × bloco (1 se a atividade pertence ao bloco)
+    pertinencia = np.zeros((len(atividades), len(blocos)))
+    for k in range(len(blocos)):
+        pertinencia[limites[k]:limites[k + 1], k] = 1.0
+
+    regioes = list(dict.fromkeys(df_blocos['Região']))
+    pontuacoes = np.full((len(regioes), len(atividades)), np.nan)
+    pontos_planilha = np.full((len(regioes), len(blocos)), np.nan)
+    for regiao, bloco, valores, pontos in zip(
+        df_blocos['Região'], df_blocos['Bloco'], df_blocos['Pontuações'], df_blocos['Pontuação no Bloco']
+    ):
+        k = blocos.index(bloco)
+        pontuacoes[regioes.index(regiao), limites[k]:limites[k + 1]] = valores
+        pontos_planilha[regioes.index(regiao), k] = pontos
+
+    # Soma das atividades por bloco, marcando como NaN os blocos sem nenhuma atividade pontuada
+    pontuados = ~np.isnan(pontuacoes)
+    soma_atividades = np.nan_to_num(pontuacoes) @ pertinencia
+    soma_atividades[(pontuados @ pertinencia) == 0] = np.nan
+
+    return {
+        'regioes': regioes,
+        'blocos': blocos,
+        'atividades': atividades,
+        'pontuacoes': np.nan_to_num(pontuacoes),
+        'pertinencia': pertinencia,
+        'maximos': np.nan_to_num(np.array([maximos_atividade.get(a, np.nan) for a in atividades], dtype=float)),
+        'soma_atividades': soma_atividades,
+        'pontos_planilha': pontos_planilha,
+        # Diferença entre a pontuação do bloco na planilha e a soma das atividades,
+        # somada a cada cenário para que pesos 1 reproduzam a planilha
+        'ajustes': np.nan_to_num(pontos_planilha - np.nan_to_num(soma_atividades)),
+    }
+
+
+def divergencias(matriz, tolerancia=1e-6):
+    """Blocos em que a soma das atividades difere da pontuação do bloco na planilha.
+
+    Retorna uma lista de tuplas ``(regiao, bloco, soma_atividades, pontos_planilha)``;
+    ``soma_atividades`` é NaN quando o bloco não tem atividades pontuadas.
+    """
+    soma = matriz['soma_atividades']
+    planilha = matriz['pontos_planilha']
+    diferentes = np.isnan(soma) | (np.abs(np.nan_to_num(soma) - planilha) > tolerancia)
+    diferentes &= ~np.isnan(planilha)
+    return [
+        (matriz['regioes'][r], matriz['blocos'][k], soma[r, k], planilha[r, k])
+        for r, k in zip(*np.nonzero(diferentes))
+    ]
+
+
+def calcular_cenarios(matriz, pesos_bloco, maximos=None):
+    """Calcula pontuações por bloco, totais ponderados e percentuais.
+
+    ``pesos_bloco`` tem forma (blocos,) ou (cenarios, blocos). ``maximos``, se
+    informado, redefine a pontuação máxima das atividades, com forma
+    (atividades,) ou (cenarios, atividades); a pontuação de cada atividade é
+    reescalada para manter a mesma proporção do máximo original. Os ajustes
+    em relação à planilha são reescalados pelo máximo do bloco, de modo que
+    pesos 1 e os máximos originais reproduzem a ``Pontuação no Bloco``.
+
+    Retorna ``(pontos_bloco, totais, percentuais)``, com formas
+    (cenarios, regioes, blocos), (cenarios, regioes) e (cenarios, regioes).
+    Quando só os pesos variam, os pontos por bloco são calculados uma vez e
+    têm forma (1, regioes, blocos).
+    """
+    pesos = np.atleast_2d(np.asarray(pesos_bloco, dtype=float))
+    originais = matriz['maximos']
+    novos = originais if maximos is None else np.asarray(maximos, dtype=float)
+    novos = np.atleast_2d(novos)
+    escala = np.divide(novos, originais, out=np.zeros_like(novos), where=originais > 0)
+
+    maximos_bloco = novos @ matriz['pertinencia']
+    originais_bloco = originais @ matriz['pertinencia']
+    escala_bloco = np.divide(
+        maximos_bloco, originais_bloco, out=np.zeros_like(maximos_bloco), where=originais_bloco > 0
+    )
+
+    # (cenarios, regioes, atividades) @ (atividades, blocos)
+    pontos_bloco = (matriz['pontuacoes'][None, :, :] * escala[:, None, :]) @ matriz['pertinencia']
+    pontos_bloco = pontos_bloco + matriz['ajustes'][None, :, :] * escala_bloco[:, None, :]
+    # (cenarios, regioes, blocos) @ (cenarios, blocos, 1)
+    totais = (pontos_bloco @ pesos[:, :, None])[:, :, 0]
+    maximo_total = (maximos_bloco * pesos).sum(axis=1)
+    percentuais = np.divide(
+        totais, maximo_total[:, None], out=np.zeros_like(totais), where=maximo_total[:, None] > 0
+    )
+    return pontos_bloco, totais, percentuais
+
+
+def calcular_posicoes(totais):
+    """Posição de cada região no ranking de cada cenário (1 = maior total)."""
+    return np.argsort(np.argsort(-totais, axis=-1, kind='stable'), axis=-1) + 1
+
+
+def sensibilidade_ranking(matriz, pesos_bloco, variacao=0.25, amostras=5000, maximos=None, seed=0):
+    """Sensibilidade do ranking a perturbações aleatórias nos pesos dos blocos.
+
+    Sorteia ``amostras`` vetores de pesos, cada peso multiplicado por um fator
+    uniforme em ``[1 - variacao, 1 + variacao]``, e avalia todos em um único
+    cálculo matricial. Retorna um dicionário com a probabilidade de cada
+    região ocupar cada posição (regioes × posições) e a posição média, a
+    melhor e a pior observadas.
+    """
+    rng = np.random.default_rng(seed)
+    pesos = np.asarray(pesos_bloco, dtype=float)
+    fatores = rng.uniform(1 - variacao, 1 + variacao, size=(amostras, len(pesos)))
+    _, totais, _ = calcular_cenarios(matriz, pesos * fatores, maximos)
+    posicoes = calcular_posicoes(totais)
+    n_regioes = len(matriz['regioes'])
+    probabilidades = (posicoes[:, :, None] == np.arange(1, n_regioes + 1)).mean(axis=0)
+    return {
+        'probabilidades': probabilidades,
+        'posicao_media': posicoes.mean(axis=0),
+        'melhor_posicao': posicoes.min(axis=0),
+        'pior_posicao': posicoes.max(axis=0),
+    }
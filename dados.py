@@ -0,0 +1,221 @@
+"""Leitura e extração dos dados da matriz avaliativa.
+
+Lê a matriz principal da planilha e a converte no formato por região e
+bloco usado pelas visualizações do dashboard e pelo motor de cenários.
+Também monta o catálogo das abas de apoio e as carrega sob demanda.
+"""
+import io
+import re
+import unicodedata
+import xml.etree.ElementTree as ET
+import zipfile
+
+import pandas as pd
+import streamlit as st
+
+# Função para ler e organizar os dados
+# Os caches recebem o conteúdo da planilha (bytes), então enviar outro arquivo ou
+# substituir o arquivo local gera novas entradas; max_entries limita a memória.
+# O motor calamine lê só a aba pedida, sem percorrer as demais.
+@st.cache_data(max_entries=4)
+def load_data(conteudo):
+    # Ler só a primeira aba (matriz principal); as demais são carregadas sob demanda
+    df = pd.read_excel(io.BytesIO(conteudo), sheet_name=0, header=[0,1], engine='calamine')  # Usar as duas primeiras linhas como cabeçalho
+    # Preencher valores ausentes na coluna 'Bloco' para garantir filtro correto
+    if 'Bloco' in df.columns:
+        df['Bloco'] = df['Bloco'].ffill()
+    elif ('GERAL', 'Bloco') in df.columns:
+        df[('GERAL', 'Bloco')] = df[('GERAL', 'Bloco')].ffill()
+    return df
+
+NS_PLANILHA = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_RELACOES = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+def indice_coluna(referencia):
+    """Converte a referência de uma célula (ex.: 'AB12') no índice da coluna, a partir de 0"""
+    indice = 0
+    for letra in re.match(r'[A-Z]+', referencia).group():
+        indice = indice * 26 + ord(letra) - ord('A') + 1
+    return indice - 1
+
+def linhas_iniciais_aba(arquivo, caminho, n_linhas):
+    """Lê só as primeiras linhas do XML de uma aba, sem percorrer o restante.
+
+    Retorna as linhas (textos compartilhados como ('s', índice)) e a dimensão
+    declarada na aba, se houver."""
+    dimensao = None
+    linhas = []
+    with arquivo.open(caminho) as xml:
+        for evento, elemento in ET.iterparse(xml, events=('start', 'end')):
+            if evento == 'start' and elemento.tag == NS_PLANILHA + 'dimension':
+                dimensao = elemento.get('ref')
+            elif evento == 'end' and elemento.tag == NS_PLANILHA + 'row':
+                linha = {}
+                coluna = -1
+                for celula in elemento.iter(NS_PLANILHA + 'c'):
+                    coluna = indice_coluna(celula.get('r')) if celula.get('r') else coluna + 1
+                    tipo = celula.get('t')
+                    valor = celula.find(NS_PLANILHA + 'v')
+                    if tipo == 'inlineStr':
+                        linha[coluna] = ''.join(t.text or '' for t in celula.iter(NS_PLANILHA + 't'))
+                    elif valor is None or valor.text is None:
+                        continue
+                    elif tipo == 's':
+                        linha[coluna] = ('s', int(valor.text))
+                    elif tipo in (None, 'n'):
+                        numero = float(valor.text)
+                        linha[coluna] = int(numero) if numero.is_integer() else numero
+                    else:
+                        # Fórmulas ('str'), erros, booleanos, datas ISO ('d') e tipos desconhecidos ficam como texto
+                        linha[coluna] = valor.text
+                linhas.append(linha)
+                elemento.clear()
+                if len(linhas) >= n_linhas:
+                    break
+    return linhas, dimensao
+
+def textos_compartilhados(arquivo, ate_indice):
+    """Lê a tabela de textos compartilhados só até o índice necessário"""
+    textos = []
+    if ate_indice < 0 or 'xl/sharedStrings.xml' not in arquivo.namelist():
+        return textos
+    with arquivo.open('xl/sharedStrings.xml') as xml:
+        for _, elemento in ET.iterparse(xml):
+            if elemento.tag == NS_PLANILHA + 'si':
+                textos.append(''.join(t.text or '' for t in elemento.iter(NS_PLANILHA + 't')))
+                elemento.clear()
+                if len(textos) > ate_indice:
+                    break
+    return textos
+
+# Catálogo das abas: nomes, colunas e dimensões, lendo só as linhas de cabeçalho
+@st.cache_data(max_entries=4)
+def catalogo_planilha(conteudo):
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as arquivo:
+        livro = ET.fromstring(arquivo.read('xl/workbook.xml'))
+        relacoes = ET.fromstring(arquivo.read('xl/_rels/workbook.xml.rels'))
+        alvos = {r.get('Id'): r.get('Target') for r in relacoes}
+        abas = []
+        for idx, aba in enumerate(livro.iter(NS_PLANILHA + 'sheet')):
+            alvo = alvos[aba.get(NS_RELACOES + 'id')]
+            caminho = alvo.lstrip('/') if alvo.startswith('/') else 'xl/' + alvo
+            linhas_cabecalho = 2 if idx == 0 else 1
+            linhas, dimensao = linhas_iniciais_aba(arquivo, caminho, linhas_cabecalho)
+            abas.append((aba.get('name'), linhas_cabecalho, linhas, dimensao))
+        indices = [v[1] for _, _, linhas, _ in abas for linha in linhas for v in linha.values() if isinstance(v, tuple)]
+        textos = textos_compartilhados(arquivo, max(indices, default=-1))
+
+    catalogo = {}
+    for nome, linhas_cabecalho, linhas, dimensao in abas:
+        cabecalho = linhas[-1] if linhas else {}
+        catalogo[nome] = {
+            'colunas': [
+                str(textos[v[1]] if isinstance(v, tuple) else v)
+                for _, v in sorted(cabecalho.items())
+            ],
+            'linhas_cabecalho': linhas_cabecalho,
+            # Dimensão declarada no arquivo; pode não existir em planilhas geradas por outros programas
+            'linhas': int(re.search(r'(\d+)$', dimensao).group(1)) - linhas_cabecalho if dimensao and ':' in dimensao else None,
+        }
+    return catalogo
+
+# Cada aba é lida só na primeira vez que uma visualização pede e fica em cache separadamente
+@st.cache_data(max_entries=16)
+def carregar_aba(conteudo, aba):
+    linhas_cabecalho = catalogo_planilha(conteudo)[aba]['linhas_cabecalho']
+    header = list(range(linhas_cabecalho)) if linhas_cabecalho > 1 else 0
+    return pd.read_excel(io.BytesIO(conteudo), sheet_name=aba, header=header, engine='calamine')
+
+def normalize(s):
+    if not isinstance(s, str):
+        return ''
+    return unicodedata.normalize('NFKD', s).encode('ASCII', 'ignore').decode('ASCII').lower().replace(' ', '')
+
+def get_blocos():
+    return [
+        ('BLOCO 1', 'Estratégia de Coleta e Redistribuição', ['Articulação', 'Triagem e Logística', 'Enriquecimento da captação']),
+        ('BLOCO 2', 'Operação do Banco de Alimentos', ['Estrutura', 'Processos']),
+        ('BLOCO 3', 'Sustentabilidade Financeira', ['Aporte Inicial', 'Custos de Operação']),
+        ('BLOCO 4', 'Sustentabilidade e Prevenção de Descarte', ['Sustentabilidade do Banco de Alimentos', 'Sustentabilidade da Ceasa']),
+        ('BLOCO 5', 'Monitoramento e Gestão', ['Resultados de Eficiência']),
+        ('BLOCO 6', 'Estrutura Física', ['Edificação'])
+    ]
+
+def get_regioes():
+    return ['Belem/PA', 'São Luis/MA', 'CEAGESP/SP', 'Mais Nutrição/CE', 'PRODAL/MG', 'Curitiba/PR', 'GLOBAL']
+
+def find_column(df, region, pattern):
+    """Encontra a coluna que contém a região e o padrão especificado"""
+    normalized_cols = {normalize(col): col for col in df.columns}
+    normalized_region = normalize(region)
+    normalized_pattern = normalize(pattern)
+    
+    matching_cols = [
+        original_col for norm_col, original_col in normalized_cols.items()
+        if normalized_region in norm_col and normalized_pattern in norm_col
+    ]
+    
+    return matching_cols[0] if matching_cols else None
+
+def extrair_dados(df):
+    blocos = get_blocos()
+    regioes = get_regioes()
+    dados = []
+    
+    # Para cada região
+    for reg in regioes:
+        # Encontrar as colunas relevantes para esta região
+        pontuacao_col = (reg, f'{reg} pontuação')
+        bloco_col = (reg, 'Pontuação no Bloco ')
+        perc_col = (reg, f'{reg} %')  # coluna de porcentagem
+        
+        # Verificar se a coluna de porcentagem existe
+        perc_col_exists = perc_col in df.columns
+        
+        # Para cada bloco
+        for bloco_idx, (bloco_nome, bloco_titulo, atividades) in enumerate(blocos):
+            try:
+                # Calcular os índices das linhas para este bloco
+                inicio = sum(len(b[2]) for b in blocos[:bloco_idx])  # Soma das atividades dos blocos anteriores
+                fim = inicio + len(atividades)
+                
+                # Extrair pontuações das atividades
+                pontuacoes = df.loc[inicio:fim-1, pontuacao_col].astype(float).values
+                
+                # Extrair pontuação do bloco (primeira linha do bloco)
+                pontuacao_bloco = float(df.loc[inicio, bloco_col])
+                
+                # Extrair porcentagem do bloco (primeira linha do bloco)
+                if perc_col_exists:
+                    try:
+                        porcentagem_bloco = float(df.loc[inicio, perc_col])
+                    except Exception:
+                        porcentagem_bloco = None
+                else:
+                    porcentagem_bloco = None
+                
+                dados.append({
+                    'Região': reg,
+                    'Bloco': bloco_nome,
+                    'Título': bloco_titulo,
+                    'Pontuação no Bloco': pontuacao_bloco,
+                    'Porcentagem no Bloco': porcentagem_bloco,
+                    'Atividades': atividades,
+                    'Pontuações': pontuacoes.tolist()
+                })
+            except Exception as e:
+                st.warning(f"Erro ao processar {reg} - {bloco_nome}: {str(e)}")
+                continue
+    
+    if not dados:
+        st.error("Nenhum dado foi extraído da planilha. Verifique o formato dos dados.")
+        return pd.DataFrame()
+    
+    return pd.DataFrame(dados)
+
+def get_maximos_atividade(df):
+    """Pontuação máxima de cada atividade de get_blocos(), pelo nome.
+
+    Usa as mesmas posições que extrair_dados usa para as pontuações."""
+    atividades = [a for _, _, atividades_bloco in get_blocos() for a in atividades_bloco]
+    return dict(zip(atividades, df[('GERAL', 'Pontuação por Atividade')].iloc[:len(atividades)].astype(float)))
@@ -2,9 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import numpy as np
 from pathlib import Path
-import unicodedata
-import re
+from dados import load_data, catalogo_planilha, carregar_aba, extrair_dados, get_maximos_atividade
+from cenarios import montar_matriz, divergencias, calcular_cenarios, calcular_posicoes, sensibilidade_ranking
 
 # Função de senha precisa ser definida antes de ser chamada
 
@@ -34,105 +35,6 @@ COLOR_SECONDARY = '#69C655'  # 25%
 COLOR_ACCENT = '#CC4A23'  # 15%
 COLOR_LIST = [COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT]
 
-# Função para ler e organizar os dados
-@st.cache_data
-def load_data(path):
-    # Ler o arquivo Excel
-    df = pd.read_excel(path, header=[0,1])  # Usar as duas primeiras linhas como cabeçalho
-    # Preencher valores ausentes na coluna 'Bloco' para garantir filtro correto
-    if 'Bloco' in df.columns:
-        df['Bloco'] = df['Bloco'].fillna(method='ffill')
-    elif ('GERAL', 'Bloco') in df.columns:
-        df[('GERAL', 'Bloco')] = df[('GERAL', 'Bloco')].fillna(method='ffill')
-    return df
-
-def normalize(s):
-    if not isinstance(s, str):
-        return ''
-    return unicodedata.normalize('NFKD', s).encode('ASCII', 'ignore').decode('ASCII').lower().replace(' ', '')
-
-def get_blocos():
-    return [
-        ('BLOCO 1', 'Estratégia de Coleta e Redistribuição', ['Articulação', 'Triagem e Logística', 'Enriquecimento da captação']),
-        ('BLOCO 2', 'Operação do Banco de Alimentos', ['Estrutura', 'Processos']),
-        ('BLOCO 3', 'Sustentabilidade Financeira', ['Aporte Inicial', 'Custos de Operação']),
-        ('BLOCO 4', 'Sustentabilidade e Prevenção de Descarte', ['Sustentabilidade do Banco de Alimentos', 'Sustentabilidade da Ceasa']),
-        ('BLOCO 5', 'Monitoramento e Gestão', ['Resultados de Eficiência']),
-        ('BLOCO 6', 'Estrutura Física', ['Edificação'])
-    ]
-
-def get_regioes():
-    return ['Belem/PA', 'São Luis/MA', 'CEAGESP/SP', 'Mais Nutrição/CE', 'PRODAL/MG', 'Curitiba/PR', 'GLOBAL']
-
-def find_column(df, region, pattern):
-    """Encontra a coluna que contém a região e o padrão especificado"""
-    normalized_cols = {normalize(col): col for col in df.columns}
-    normalized_region = normalize(region)
-    normalized_pattern = normalize(pattern)
-    
-    matching_cols = [
-        original_col for norm_col, original_col in normalized_cols.items()
-        if normalized_region in norm_col and normalized_pattern in norm_col
-    ]
-    
-    return matching_cols[0] if matching_cols else None
-
-def extrair_dados(df):
-    blocos = get_blocos()
-    regioes = get_regioes()
-    dados = []
-    
-    # Para cada região
-    for reg in regioes:
-        # Encontrar as colunas relevantes para esta região
-        pontuacao_col = (reg, f'{reg} pontuação')
-        bloco_col = (reg, 'Pontuação no Bloco ')
-        perc_col = (reg, f'{reg} %')  # coluna de porcentagem
-        
-        # Verificar se a coluna de porcentagem existe
-        perc_col_exists = perc_col in df.columns
-        
-        # Para cada bloco
-        for bloco_idx, (bloco_nome, bloco_titulo, atividades) in enumerate(blocos):
-            try:
-                # Calcular os índices das linhas para este bloco
-                inicio = sum(len(b[2]) for b in blocos[:bloco_idx])  # Soma das atividades dos blocos anteriores
-                fim = inicio + len(atividades)
-                
-                # Extrair pontuações das atividades
-                pontuacoes = df.loc[inicio:fim-1, pontuacao_col].astype(float).values
-                
-                # Extrair pontuação do bloco (primeira linha do bloco)
-                pontuacao_bloco = float(df.loc[inicio, bloco_col])
-                
-                # Extrair porcentagem do bloco (primeira linha do bloco)
-                if perc_col_exists:
-                    try:
-                        porcentagem_bloco = float(df.loc[inicio, perc_col])
-                    except Exception:
-                        porcentagem_bloco = None
-                else:
-                    porcentagem_bloco = None
-                
-                dados.append({
-                    'Região': reg,
-                    'Bloco': bloco_nome,
-                    'Título': bloco_titulo,
-                    'Pontuação no Bloco': pontuacao_bloco,
-                    'Porcentagem no Bloco': porcentagem_bloco,
-                    'Atividades': atividades,
-                    'Pontuações': pontuacoes.tolist()
-                })
-            except Exception as e:
-                st.warning(f"Erro ao processar {reg} - {bloco_nome}: {str(e)}")
-                continue
-    
-    if not dados:
-        st.error("Nenhum dado foi extraído da planilha. Verifique o formato dos dados.")
-        return pd.DataFrame()
-    
-    return pd.DataFrame(dados)
-
 def get_destaques(df_blocos):
     if df_blocos.empty:
         return {}
@@ -312,8 +214,11 @@ if not Path(file_path).exists():
     if not file_path:
         st.stop()
 
-# Carregar dados
-df = load_data(file_path)
+# Conteúdo da planilha como chave dos caches (a posição de leitura do arquivo enviado não importa)
+conteudo = file_path.getvalue() if hasattr(file_path, 'getvalue') else Path(file_path).read_bytes()
+
+# Carregar dados: só a matriz principal; as demais abas são lidas pela visualização 'Abas da Planilha'
+df = load_data(conteudo)
 
 # Extrair dados processados
 df_blocos = extrair_dados(df)
@@ -339,7 +244,7 @@ with st.sidebar.expander('Faixa de pontuação do bloco', expanded=False):
     faixa_pontuacao = st.slider('', min_value=pontuacao_min, max_value=pontuacao_max, value=(pontuacao_min, pontuacao_max), key='faixa_sidebar')
 
 # Seletor de tipo de visualização
-tipo_viz = st.sidebar.radio('Tipo de visualização', ['Gráfico de Barras', 'Radar', 'Tabela'])
+tipo_viz = st.sidebar.radio('Tipo de visualização', ['Gráfico de Barras', 'Radar', 'Tabela', 'Cenários (What-if)', 'Abas da Planilha'])
 
 def bloco_contem_atividade(row):
     return any(a in atividades_sel for a in row['Atividades'])
@@ -379,6 +284,138 @@ if tipo_viz == 'Gráfico de Barras' and destaques and not df_blocos_filt.empty:
         unsafe_allow_html=True
     )
 
+# Painel de cenários (what-if): roda como fragmento para que mudanças nos
+# controles recalculem só este painel, sem reexecutar o dashboard inteiro
+@st.fragment
+def painel_cenarios(matriz, resultados_planilha):
+    color_discrete_map = {
+        'GLOBAL': '#4A90E2',
+        'Belem/PA': '#2F473F',
+        'São Luis/MA': '#69C655',
+        'Mais Nutrição/CE': '#A3D9A5',
+        'PRODAL/MG': '#4CAF50',
+        'Curitiba/PR': '#81C784',
+        'CEAGESP/SP': '#388E3C',
+    }
+    st.markdown('#### Pesos dos Blocos')
+    colunas = st.columns(len(matriz['blocos']))
+    pesos = [
+        coluna.slider(bloco, min_value=0.0, max_value=3.0, value=1.0, step=0.1, key=f'peso_{bloco}')
+        for coluna, bloco in zip(colunas, matriz['blocos'])
+    ]
+    with st.expander('Pontuação máxima por atividade', expanded=False):
+        maximos = [
+            st.number_input(atividade, min_value=0.0, value=float(maximo), step=1.0, key=f'maximo_{atividade}')
+            for atividade, maximo in zip(matriz['atividades'], matriz['maximos'])
+        ]
+    # Pesos 1 reproduzem a 'Pontuação no Bloco' da planilha; avisar onde ela não bate com as atividades
+    divergentes = divergencias(matriz)
+    totais_blocos = dict(zip(matriz['regioes'], np.nansum(matriz['pontos_planilha'], axis=1)))
+    resultados_divergentes = [
+        (regiao, totais_blocos[regiao], resultado)
+        for regiao, resultado in resultados_planilha.items()
+        if regiao in totais_blocos and pd.notnull(resultado) and abs(totais_blocos[regiao] - resultado) > 1e-6
+    ]
+    if divergentes or resultados_divergentes:
+        with st.expander('Atenção: diferenças entre atividades e totais da planilha', expanded=False):
+            st.markdown(
+                'O cenário original usa a **Pontuação no Bloco** da planilha. Nos blocos abaixo, ela difere da '
+                'soma das atividades; a diferença é mantida em todos os cenários, reescalada pelo máximo do bloco.'
+            )
+            if divergentes:
+                st.dataframe(pd.DataFrame(
+                    [
+                        {
+                            'Região': regiao,
+                            'Bloco': bloco,
+                            'Soma das Atividades': None if np.isnan(soma) else soma,
+                            'Pontuação no Bloco (planilha)': pontos,
+                        }
+                        for regiao, bloco, soma, pontos in divergentes
+                    ]
+                ), hide_index=True, use_container_width=True)
+            if resultados_divergentes:
+                st.markdown('O **Resultado da Matriz** da planilha difere da soma dos blocos para:')
+                st.dataframe(pd.DataFrame(
+                    resultados_divergentes,
+                    columns=['Região', 'Soma dos Blocos', 'Resultado da Matriz (planilha)']
+                ), hide_index=True, use_container_width=True)
+
+    # Cenário atual e cenário original (pesos 1 e máximos da planilha) em um único cálculo
+    _, totais, percentuais = calcular_cenarios(
+        matriz,
+        [pesos, np.ones(len(pesos))],
+        [maximos, matriz['maximos']]
+    )
+    posicoes = calcular_posicoes(totais)
+    df_cenario = pd.DataFrame({
+        'Região': matriz['regioes'],
+        'Posição': posicoes[0],
+        'Variação de Posição': posicoes[1] - posicoes[0],
+        'Pontuação Ponderada': totais[0].round(2),
+        'Percentual (%)': (percentuais[0] * 100).round(2),
+        'Percentual Original (%)': (percentuais[1] * 100).round(2),
+    }).sort_values('Posição')
+
+    fig = px.bar(
+        df_cenario,
+        x='Região',
+        y='Percentual (%)',
+        color='Região',
+        color_discrete_map=color_discrete_map,
+        text='Percentual (%)',
+        title='Percentual da Matriz no Cenário'
+    )
+    fig.update_traces(textfont_size=18, textfont_color='#2F473F')
+    fig.update_layout(
+        font=dict(size=18, color='#2F473F'),
+        legend=dict(font=dict(size=16, color='#2F473F'), bgcolor='#fff'),
+        title_font=dict(size=22, color='#2F473F'),
+        plot_bgcolor='#fff',
+        paper_bgcolor='#fff',
+        xaxis=dict(color='#2F473F', tickfont=dict(color='#2F473F')),
+        yaxis=dict(color='#2F473F', tickfont=dict(color='#2F473F'), range=[0, 100])
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(df_cenario, hide_index=True, use_container_width=True)
+
+    # Sensibilidade do ranking (Monte Carlo)
+    st.markdown('#### Sensibilidade do Ranking (Monte Carlo)')
+    col_variacao, col_amostras = st.columns(2)
+    variacao = col_variacao.slider('Variação aleatória dos pesos (±%)', min_value=0, max_value=100, value=25, step=5, key='mc_variacao')
+    amostras = col_amostras.select_slider('Número de simulações', options=[1000, 5000, 10000, 50000], value=5000, key='mc_amostras')
+    sensibilidade = sensibilidade_ranking(matriz, pesos, variacao / 100, amostras, maximos)
+    posicoes_labels = [f'{i}º' for i in range(1, len(matriz['regioes']) + 1)]
+    fig = px.imshow(
+        sensibilidade['probabilidades'] * 100,
+        x=posicoes_labels,
+        y=matriz['regioes'],
+        text_auto='.0f',
+        color_continuous_scale=[[0, '#fff'], [1, COLOR_SECONDARY]],
+        zmin=0,
+        zmax=100,
+        aspect='auto',
+        title='Probabilidade de cada Posição no Ranking (%)'
+    )
+    fig.update_layout(
+        font=dict(size=18, color='#2F473F'),
+        title_font=dict(size=22, color='#2F473F'),
+        plot_bgcolor='#fff',
+        paper_bgcolor='#fff',
+        xaxis_title='Posição',
+        yaxis_title='Região'
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    df_sensibilidade = pd.DataFrame({
+        'Região': matriz['regioes'],
+        'Posição no Cenário': posicoes[0],
+        'Posição Média': sensibilidade['posicao_media'].round(2),
+        'Melhor Posição': sensibilidade['melhor_posicao'],
+        'Pior Posição': sensibilidade['pior_posicao'],
+        'Chance de 1º Lugar (%)': (sensibilidade['probabilidades'][:, 0] * 100).round(1),
+    }).sort_values('Posição Média')
+    st.dataframe(df_sensibilidade, hide_index=True, use_container_width=True)
+
 # Visualização
 if not df_blocos_filt.empty:
     if tipo_viz == 'Gráfico de Barras':
@@ -701,4 +738,54 @@ if not df_blocos_filt.empty:
             </style>
             """,
             unsafe_allow_html=True
-        ) 
\ No newline at end of file
+        ) 
+
+# Os cenários e as abas da planilha não dependem dos filtros de bloco, atividade e pontuação
+if tipo_viz == 'Cenários (What-if)':
+    # Usa todos os blocos das Ceasas selecionadas: o ranking depende da matriz completa
+    df_cenarios = df_blocos[df_blocos['Região'].isin(regioes_sel)]
+    if df_cenarios.empty:
+        st.info('Selecione ao menos um Ceasa para simular os cenários.')
+    elif ('GERAL', 'Pontuação por Atividade') not in df.columns:
+        st.info('A planilha não possui a coluna de pontuação máxima por atividade, necessária para os cenários.')
+    else:
+        maximos_atividade = get_maximos_atividade(df)
+        resultados_planilha = {
+            reg: df.loc[0, (reg, 'Resultado da Matriz')]
+            for reg in df_cenarios['Região'].unique()
+            if (reg, 'Resultado da Matriz') in df.columns
+        }
+        painel_cenarios(montar_matriz(df_cenarios, maximos_atividade), resultados_planilha)
+
+elif tipo_viz == 'Abas da Planilha':
+    st.markdown('#### Abas da Planilha')
+    # Uma falha no catálogo não pode impedir o uso da matriz principal nas demais visualizações
+    try:
+        catalogo = catalogo_planilha(conteudo)
+    except Exception as e:
+        st.warning(f"Não foi possível ler o catálogo das abas da planilha: {str(e)}")
+        st.stop()
+    df_catalogo = pd.DataFrame([
+        {
+            'Aba': aba,
+            'Linhas': info['linhas'],
+            'Colunas': ', '.join(info['colunas']),
+        }
+        for aba, info in catalogo.items()
+    ])
+    st.dataframe(df_catalogo, hide_index=True, use_container_width=True)
+    # A primeira aba é a matriz principal, já carregada por load_data
+    abas_apoio = list(catalogo)[1:]
+    if not abas_apoio:
+        st.info('A planilha não possui abas de apoio além da matriz principal.')
+    else:
+        aba = st.selectbox('Selecione a aba:', abas_apoio, key='aba_apoio')
+        df_aba = carregar_aba(conteudo, aba)
+        csv = df_aba.to_csv(index=False, sep=';', encoding='utf-8')
+        st.download_button(
+            label=f'Baixar aba {aba} em CSV',
+            data=csv,
+            file_name=f'{aba}.csv',
+            mime='text/csv'
+        )
+        st.dataframe(df_aba, hide_index=True, use_container_width=True)
@@ -0,0 +1,421 @@
+"""Teste de carga do dashboard com várias sessões simuladas.
+
+Usa a API de testes headless do Streamlit (``streamlit.testing.v1.AppTest``)
+para conduzir várias sessões pelo ``dashboard.py`` sem navegador: passa pela
+senha, envia uma planilha, altera filtros e alterna entre as visualizações.
+Ao final, informa a latência de rerun (p50/p95/p99) e o pico de memória (RSS)
+do processo.
+
+O ``AppTest`` executa um rerun por vez em cada processo (usa o
+``Runtime`` global do Streamlit). No modo padrão, as sessões ficam abertas
+ao mesmo tempo, com seu próprio ``session_state`` e os caches compartilhados,
+mas os reruns são intercalados (round-robin): a latência mede o custo de
+cada rerun, não a contenção entre sessões. Para medir contenção, use
+``--processos`` (sessões divididas entre processos em paralelo, cada um com
+seus próprios caches) ou ``--varredura``, que repete o teste com 1, 2, 4...
+sessões em paralelo para comparar a latência com o número de sessões.
+
+Exemplos:
+    python loadtest.py --sessoes 20 --iteracoes 15 --linhas-aba 20000
+    python loadtest.py --varredura 1,2,4,8 --iteracoes 10
+"""
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+from streamlit.testing.v1 import AppTest
+
+BASE_DIR = Path(__file__).resolve().parent
+SCRIPT_DASHBOARD = BASE_DIR / 'dashboard.py'
+PLANILHA_MODELO = BASE_DIR / 'Matriz_Avaliativa_Ceasas.xlsx'
+SENHA = 'PCF2025'
+MIME_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def gerar_planilha_sintetica(linhas_extras=1000, regioes_extras=12, abas_extras=3, linhas_aba=5000, seed=0):
+    """Gera uma planilha grande no mesmo formato da matriz avaliativa.
+
+    Mantém as linhas originais (lidas por posição no dashboard), acrescenta
+    ``linhas_extras`` atividades ao final e ``regioes_extras`` grupos de
+    colunas de Ceasas fictícios. Inclui ainda ``abas_extras`` abas de apoio
+    (respostas brutas) com ``linhas_aba`` linhas cada. Retorna o conteúdo do
+    arquivo ``.xlsx``.
+
+    As atividades e os Ceasas extras só aumentam o arquivo a ser lido: o
+    dashboard extrai apenas as regiões de ``get_regioes()`` e as linhas de
+    ``get_blocos()``, então as visualizações continuam com a matriz original.
+    Como ``load_data`` fica em cache pelo conteúdo do arquivo, esse custo
+    aparece só no primeiro upload de cada processo (inicialização com cache
+    frio). As abas de apoio são lidas pela visualização 'Abas da Planilha'.
+    """
+    rng = random.Random(seed)
+    base = pd.read_excel(PLANILHA_MODELO, header=[0, 1])
+    colunas = list(base.columns)
+    linhas = [[None if pd.isna(v) else v for v in row] for row in base.itertuples(index=False)]
+    col_pontuacao_atividade = colunas.index(('GERAL', 'Pontuação por Atividade'))
+    col_atividade = colunas.index(('GERAL', 'Atividade'))
+
+    # Atividades extras: só as colunas de atividade são preenchidas
+    for i in range(linhas_extras):
+        linha = [None] * len(colunas)
+        maximo = rng.choice([2, 6, 8, 12, 14, 22, 26, 28, 32, 60])
+        linha[col_atividade] = f'Atividade extra {i + 1}'
+        linha[col_pontuacao_atividade] = maximo
+        for j, (regiao, nome) in enumerate(colunas):
+            if nome == f'{regiao} pontuação':
+                linha[j] = rng.randint(0, maximo)
+            elif nome == '% em relação ao Total do Bloco' and linha[j - 1] is not None:
+                linha[j] = round(linha[j - 1] / maximo, 4)
+        linhas.append(linha)
+
+    # Ceasas fictícios, com pontuações coerentes com o gabarito GERAL
+    blocos_geral = base[('GERAL', 'Bloco')].ffill()
+    maximos_bloco = base[('GERAL', 'Pontuação Maxima por Bloco')]
+    maximo_matriz = float(base[('GERAL', 'Pontuação Maxima da Matriz')].dropna().iloc[0])
+    for k in range(regioes_extras):
+        regiao = f'Ceasa {k + 1:03d}/XX'
+        pontuacoes = [
+            rng.randint(0, int(linha[col_pontuacao_atividade] or 0)) for linha in linhas
+        ]
+        totais_bloco = {}
+        for idx, bloco in enumerate(blocos_geral):
+            totais_bloco[bloco] = totais_bloco.get(bloco, 0) + pontuacoes[idx]
+        resultado = sum(totais_bloco.values())
+        colunas.extend([
+            (regiao, f'{regiao} pontuação'),
+            (regiao, '% em relação ao Total do Bloco'),
+            (regiao, 'Pontuação no Bloco '),
+            (regiao, '% em relação ao Bloco 1'),
+            (regiao, 'Resultado da Matriz'),
+            (regiao, '% em relação a Matriz Total'),
+        ])
+        for idx, linha in enumerate(linhas):
+            maximo = linha[col_pontuacao_atividade] or 1
+            novos = [pontuacoes[idx], round(pontuacoes[idx] / maximo, 4), None, None, None, None]
+            if idx < len(base) and pd.notnull(maximos_bloco.iloc[idx]):
+                total = totais_bloco[blocos_geral.iloc[idx]]
+                novos[2] = float(total)
+                novos[3] = round(total / maximos_bloco.iloc[idx], 4)
+            if idx == 0:
+                novos[4] = float(resultado)
+                novos[5] = round(resultado / maximo_matriz, 4)
+            linha.extend(novos)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Planilha1')
+    ws.append([c[0] for c in colunas])
+    ws.append([c[1] for c in colunas])
+    for linha in linhas:
+        ws.append(linha)
+
+    # Abas de apoio, lidas pelo dashboard só quando a visualização pede
+    regioes = list(dict.fromkeys(c[0] for c in colunas if c[0] != 'GERAL'))
+    atividades = [linha[col_atividade] for linha in linhas[:len(base)]]
+    for a in range(abas_extras):
+        ws = wb.create_sheet(f'Respostas {a + 1}')
+        ws.append(['Região', 'Atividade', 'Pergunta', 'Resposta', 'Pontuação', 'Evidência'])
+        for i in range(linhas_aba):
+            ws.append([
+                rng.choice(regioes),
+                rng.choice(atividades),
+                f'Pergunta {rng.randint(1, 40)}',
+                rng.choice(['Sim', 'Não', 'Parcial']),
+                rng.randint(0, 4),
+                f'Evidência {a + 1}-{i + 1}',
+            ])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def pico_rss_mb():
+    """Pico de memória residente do processo, em MB."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+class Sessao:
+    """Uma sessão simulada de analista sobre o dashboard."""
+
+    def __init__(self, nome, planilha, rng, timeout):
+        self.nome = nome
+        self.planilha = planilha
+        self.rng = rng
+        self.timeout = timeout
+        self.at = AppTest.from_file(str(SCRIPT_DASHBOARD), default_timeout=timeout)
+        self.latencias = []
+        self.erro = None
+
+    def _rerun(self, acao, executar):
+        inicio = time.perf_counter()
+        try:
+            executar()
+        except RuntimeError as e:
+            # O AppTest interrompe o rerun que passa do timeout; a sessão é encerrada,
+            # mas as latências já coletadas continuam no relatório
+            self.latencias.append((acao, time.perf_counter() - inicio))
+            self.erro = f'{acao}: {e}'
+            return
+        self.latencias.append((acao, time.perf_counter() - inicio))
+        if self.at.exception:
+            self.erro = f'{acao}: {self.at.exception[0].message}'
+
+    def abrir(self):
+        """Primeiro acesso: tela de senha, login e envio da planilha."""
+        self._rerun('abrir', self.at.run)
+        if self.erro:
+            return
+        self._rerun('senha', lambda: self.at.text_input[0].input(SENHA).run())
+        if self.erro:
+            return
+        if self.at.file_uploader:
+            nome_arquivo, conteudo = self.planilha
+            self._rerun(
+                'upload',
+                lambda: self.at.file_uploader[0].upload(nome_arquivo, conteudo, MIME_XLSX).run(),
+            )
+
+    def passo(self):
+        """Executa uma interação aleatória de filtro ou troca de visualização."""
+        at = self.at
+        rng = self.rng
+        acoes = ['visualizacao', 'regioes', 'blocos', 'faixa']
+        if any(s.key == 'aba_apoio' for s in at.selectbox):
+            acoes.append('aba')
+        elif at.selectbox and not at.selectbox[0].disabled:
+            acoes.append('percentual')
+        acao = rng.choice(acoes)
+        if acao == 'visualizacao':
+            radio = at.sidebar.radio[0]
+            opcao = rng.choice([o for o in radio.options if o != radio.value] or radio.options)
+            executar = lambda: radio.set_value(opcao).run()
+        elif acao in ('regioes', 'blocos'):
+            widget = at.multiselect(key=f'{acao}_sidebar')
+            escolha = rng.sample(widget.options, rng.randint(1, len(widget.options)))
+            executar = lambda: widget.set_value(escolha).run()
+        elif acao == 'faixa':
+            slider = at.slider(key='faixa_sidebar')
+            minimo, maximo = slider.min, slider.max
+            a, b = sorted(rng.uniform(minimo, maximo) for _ in range(2))
+            executar = lambda: slider.set_value((minimo if rng.random() < 0.5 else a, b)).run()
+        elif acao == 'aba':
+            selectbox = at.selectbox(key='aba_apoio')
+            executar = lambda: selectbox.set_value(rng.choice(selectbox.options)).run()
+        else:
+            selectbox = at.selectbox[0]
+            executar = lambda: selectbox.set_value(rng.choice(selectbox.options)).run()
+        self._rerun(acao, executar)
+
+
+def percentis(valores):
+    if len(valores) < 2:
+        v = valores[0] if valores else float('nan')
+        return {'p50': v, 'p95': v, 'p99': v}
+    q = statistics.quantiles(valores, n=100, method='inclusive')
+    return {'p50': q[49], 'p95': q[94], 'p99': q[98]}
+
+
+def executar_sessoes(sessoes, iteracoes, planilha, seed=0, timeout=120, primeira=1, barreira=None):
+    """Abre ``sessoes`` sessões neste processo e intercala ``iteracoes`` interações.
+
+    Roda em um diretório temporário sem a planilha local, para que o dashboard
+    exiba o campo de upload. Se ``barreira`` for informada, espera todos os
+    processos chegarem a ela antes de abrir as sessões. Retorna as latências
+    de cada sessão, os erros e o pico de RSS do processo.
+    """
+    # Os avisos de rótulo vazio do dashboard poluiriam o relatório
+    logging.disable(logging.WARNING)
+    rng = random.Random(seed)
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(BASE_DIR / '1.png', tmp)
+        os.chdir(tmp)
+        try:
+            if barreira is not None:
+                barreira.wait()
+            ativas = []
+            for i in range(sessoes):
+                sessao = Sessao(f'sessao-{primeira + i}', planilha, random.Random(rng.random()), timeout)
+                sessao.abrir()
+                ativas.append(sessao)
+            for _ in range(iteracoes):
+                for sessao in ativas:
+                    if not sessao.erro:
+                        sessao.passo()
+        finally:
+            os.chdir(diretorio_original)
+    # O primeiro upload do processo encontra os caches vazios: é o custo de inicialização
+    uploads = [lat for s in ativas for acao, lat in s.latencias if acao == 'upload']
+    return {
+        'inicializacao_s': uploads[0] if uploads else None,
+        'latencias': [(acao, lat) for s in ativas for acao, lat in s.latencias],
+        'erros': {s.nome: s.erro for s in ativas if s.erro},
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def executar_teste(sessoes, iteracoes, planilha, seed=0, timeout=120, processos=None):
+    """Executa o teste de carga e retorna um dicionário com o relatório.
+
+    Sem ``processos``, todas as sessões rodam intercaladas neste processo: o
+    ``AppTest`` executa um rerun por vez, então a latência mede o custo de
+    cada rerun com as sessões e caches residentes, mas não a contenção entre
+    sessões. Com ``processos``, as sessões são divididas entre processos
+    filhos que rodam em paralelo (cada um com seus próprios caches), o que
+    expõe a disputa por CPU e memória.
+    """
+    inicio = time.perf_counter()
+    if processos is None:
+        resultados = [executar_sessoes(sessoes, iteracoes, planilha, seed, timeout)]
+    else:
+        processos = min(processos, sessoes)
+        contexto = multiprocessing.get_context('spawn')
+        with contexto.Manager() as gerenciador, ProcessPoolExecutor(processos, mp_context=contexto) as executor:
+            barreira = gerenciador.Barrier(processos)
+            divisao = [sessoes // processos + (1 if i < sessoes % processos else 0) for i in range(processos)]
+            futuros = [
+                executor.submit(
+                    executar_sessoes, n, iteracoes, planilha, seed + i, timeout,
+                    sum(divisao[:i]) + 1, barreira,
+                )
+                for i, n in enumerate(divisao)
+            ]
+            resultados = [f.result() for f in futuros]
+    duracao = time.perf_counter() - inicio
+
+    todas = [lat for r in resultados for _, lat in r['latencias']]
+    frios = [r['inicializacao_s'] for r in resultados if r['inicializacao_s'] is not None]
+    quentes = [lat for r in resultados for acao, lat in r['latencias'] if acao == 'upload'][len(frios):]
+    por_acao = {}
+    for r in resultados:
+        for acao, lat in r['latencias']:
+            por_acao.setdefault(acao, []).append(lat)
+    return {
+        'sessoes': sessoes,
+        'iteracoes': iteracoes,
+        'processos': len(resultados),
+        'paralelo': processos is not None,
+        'reruns': len(todas),
+        'duracao_s': duracao,
+        'latencia_s': percentis(todas),
+        # Rerun do upload com caches vazios (leitura da matriz principal)
+        # e com a planilha já em cache, para isolar o custo de inicialização
+        'inicializacao_s': {
+            'cache_frio': statistics.median(frios) if frios else None,
+            'cache_quente': statistics.median(quentes) if quentes else None,
+        },
+        'latencia_por_acao_s': {
+            acao: dict(percentis(lats), n=len(lats)) for acao, lats in sorted(por_acao.items())
+        },
+        # Pico de cada processo; com vários processos, a soma é o limite superior do total
+        'pico_rss_mb': max(r['pico_rss_mb'] for r in resultados),
+        'pico_rss_total_mb': sum(r['pico_rss_mb'] for r in resultados),
+        'erros': {nome: erro for r in resultados for nome, erro in r['erros'].items()},
+    }
+
+
+def imprimir_relatorio(relatorio):
+    lat = relatorio['latencia_s']
+    if not relatorio['paralelo']:
+        print('Modo: sessões intercaladas em 1 processo (reruns serializados; não mede contenção entre sessões)')
+    else:
+        print(f"Modo: {relatorio['processos']} processos em paralelo (caches por processo)")
+    print(f"Sessões: {relatorio['sessoes']} | Iterações por sessão: {relatorio['iteracoes']} "
+          f"| Reruns: {relatorio['reruns']} | Duração: {relatorio['duracao_s']:.1f}s")
+    print(f"Latência de rerun (ms): p50={lat['p50'] * 1000:.1f} "
+          f"p95={lat['p95'] * 1000:.1f} p99={lat['p99'] * 1000:.1f}")
+    inicializacao = relatorio['inicializacao_s']
+    if inicializacao['cache_frio'] is not None:
+        quente = inicializacao['cache_quente']
+        print(f"Inicialização (rerun do upload, ms): cache frio={inicializacao['cache_frio'] * 1000:.1f} "
+              f"cache quente={'-' if quente is None else f'{quente * 1000:.1f}'}")
+    if not relatorio['paralelo']:
+        print(f"Pico de RSS: {relatorio['pico_rss_mb']:.1f} MB")
+    else:
+        print(f"Pico de RSS: {relatorio['pico_rss_mb']:.1f} MB por processo "
+              f"(soma: {relatorio['pico_rss_total_mb']:.1f} MB)")
+    print('Por ação (ms):')
+    for acao, p in relatorio['latencia_por_acao_s'].items():
+        print(f"  {acao:<14} n={p['n']:<5} p50={p['p50'] * 1000:8.1f} "
+              f"p95={p['p95'] * 1000:8.1f} p99={p['p99'] * 1000:8.1f}")
+    for nome, erro in relatorio['erros'].items():
+        print(f'ERRO em {nome}: {erro}')
+
+
+def imprimir_varredura(relatorios):
+    print('Sessões em paralelo x latência de rerun (ms):')
+    print(f"  {'sessões':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'RSS/proc (MB)':>14}")
+    for r in relatorios:
+        lat = r['latencia_s']
+        print(f"  {r['sessoes']:>7} {lat['p50'] * 1000:8.1f} {lat['p95'] * 1000:8.1f} "
+              f"{lat['p99'] * 1000:8.1f} {r['pico_rss_mb']:14.1f}")
+    for r in relatorios:
+        for nome, erro in r['erros'].items():
+            print(f"ERRO ({r['sessoes']} sessões) em {nome}: {erro}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga do dashboard com sessões simuladas (sem navegador).')
+    parser.add_argument('--sessoes', type=int, default=10, help='Número de sessões simuladas.')
+    parser.add_argument('--iteracoes', type=int, default=10, help='Interações por sessão após o login e o upload.')
+    parser.add_argument('--processos', type=int,
+                        help='Processos em paralelo; se omitido, as sessões são intercaladas em um único processo.')
+    parser.add_argument('--varredura', type=lambda v: [int(n) for n in v.split(',')],
+                        help='Lista de quantidades de sessões (ex.: 1,2,4,8), cada sessão em seu próprio processo.')
+    parser.add_argument('--planilha', type=Path, help='Planilha a enviar; se omitida, gera uma planilha sintética grande.')
+    parser.add_argument('--linhas-extras', type=int, default=1000, help='Atividades extras na planilha sintética (só aumentam o arquivo lido no upload).')
+    parser.add_argument('--regioes-extras', type=int, default=12, help='Ceasas fictícios extras na planilha sintética (só aumentam o arquivo lido no upload).')
+    parser.add_argument('--abas-extras', type=int, default=3, help='Abas de apoio na planilha sintética.')
+    parser.add_argument('--linhas-aba', type=int, default=5000, help='Linhas de cada aba de apoio.')
+    parser.add_argument('--seed', type=int, default=0, help='Semente para as interações e a planilha sintética.')
+    parser.add_argument('--timeout', type=float, default=120, help='Tempo máximo de cada rerun, em segundos.')
+    parser.add_argument('--json', type=Path, help='Grava o relatório em JSON neste caminho.')
+    args = parser.parse_args(argv)
+
+    if args.planilha:
+        planilha = (args.planilha.name, args.planilha.read_bytes())
+    else:
+        # Gerada em outro processo para que a memória usada na geração não entre no pico de RSS medido
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(1, mp_context=contexto) as executor:
+            conteudo = executor.submit(
+                gerar_planilha_sintetica,
+                args.linhas_extras, args.regioes_extras, args.abas_extras, args.linhas_aba, args.seed,
+            ).result()
+        planilha = ('Matriz_Sintetica.xlsx', conteudo)
+
+    if args.varredura:
+        relatorio = [
+            executar_teste(n, args.iteracoes, planilha, seed=args.seed, timeout=args.timeout, processos=n)
+            for n in args.varredura
+        ]
+        imprimir_varredura(relatorio)
+        erros = any(r['erros'] for r in relatorio)
+    else:
+        relatorio = executar_teste(
+            args.sessoes, args.iteracoes, planilha, seed=args.seed, timeout=args.timeout, processos=args.processos
+        )
+        imprimir_relatorio(relatorio)
+        erros = bool(relatorio['erros'])
+    if args.json:
+        args.json.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+    return 1 if erros else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from cenarios import montar_matriz, divergencias, calcular_cenarios, calcular_posicoes, sensibilidade_ranking
+from dados import load_data, extrair_dados, get_maximos_atividade
+
+PLANILHA = Path(__file__).resolve().parent.parent / 'Matriz_Avaliativa_Ceasas.xlsx'
+
+
+@pytest.fixture(scope='module')
+def planilha():
+    return load_data(PLANILHA.read_bytes())
+
+
+@pytest.fixture(scope='module')
+def df_blocos(planilha):
+    return extrair_dados(planilha)
+
+
+@pytest.fixture(scope='module')
+def maximos_atividade(planilha):
+    return get_maximos_atividade(planilha)
+
+
+@pytest.fixture(scope='module')
+def matriz(df_blocos, maximos_atividade):
+    return montar_matriz(df_blocos, maximos_atividade)
+
+
+def test_pesos_unitarios_reproduzem_a_planilha(matriz, df_blocos):
+    pontos_bloco, totais, percentuais = calcular_cenarios(matriz, np.ones(len(matriz['blocos'])))
+    esperado = df_blocos.pivot(index='Região', columns='Bloco', values='Pontuação no Bloco')
+    esperado = esperado.loc[matriz['regioes'], matriz['blocos']].values
+    np.testing.assert_allclose(pontos_bloco[0], esperado)
+    np.testing.assert_allclose(totais[0], esperado.sum(axis=1))
+    np.testing.assert_allclose(percentuais[0], esperado.sum(axis=1) / matriz['maximos'].sum())
+
+
+def test_bloco_ausente_nao_desloca_os_maximos(df_blocos, maximos_atividade):
+    # extrair_dados pula o bloco com célula inválida; a ordem dos blocos e os máximos não podem mudar
+    ausente = (df_blocos['Região'] == 'Belem/PA') & (df_blocos['Bloco'] == 'BLOCO 2')
+    matriz = montar_matriz(df_blocos[~ausente], maximos_atividade)
+    assert matriz['blocos'] == ['BLOCO 1', 'BLOCO 2', 'BLOCO 3', 'BLOCO 4', 'BLOCO 5', 'BLOCO 6']
+    np.testing.assert_allclose(matriz['maximos'] @ matriz['pertinencia'], [72, 86, 14, 28, 8, 28])
+
+
+def test_divergencias_da_planilha(matriz):
+    encontradas = {(regiao, bloco): soma for regiao, bloco, soma, _ in divergencias(matriz)}
+    # Bloco 1 soma 2 pontos a menos que a planilha; o GLOBAL não tem atividades pontuadas no Bloco 3
+    assert encontradas[('Belem/PA', 'BLOCO 1')] == 40
+    assert np.isnan(encontradas[('GLOBAL', 'BLOCO 3')])
+    assert ('Belem/PA', 'BLOCO 2') not in encontradas
+
+
+def test_formas_em_lote(matriz):
+    n_regioes, n_blocos = len(matriz['regioes']), len(matriz['blocos'])
+    pesos = np.random.default_rng(0).uniform(0, 2, size=(50, n_blocos))
+
+    pontos_bloco, totais, percentuais = calcular_cenarios(matriz, pesos)
+    assert pontos_bloco.shape == (1, n_regioes, n_blocos)
+    assert totais.shape == percentuais.shape == (50, n_regioes)
+    for s in (0, 17, 49):
+        _, total_unico, _ = calcular_cenarios(matriz, pesos[s])
+        np.testing.assert_allclose(totais[s], total_unico[0])
+
+    maximos = np.tile(matriz['maximos'], (50, 1))
+    pontos_bloco, totais, _ = calcular_cenarios(matriz, pesos, maximos)
+    assert pontos_bloco.shape == (50, n_regioes, n_blocos)
+    assert totais.shape == (50, n_regioes)
+
+
+def test_maximo_de_atividade_reescala_pontuacao(matriz):
+    pesos = np.ones(len(matriz['blocos']))
+    maximos = matriz['maximos'].copy()
+    maximos[0] *= 2
+    pontos_base, _, _ = calcular_cenarios(matriz, pesos)
+    pontos, _, _ = calcular_cenarios(matriz, pesos, maximos)
+    # Só o bloco da atividade alterada muda, e os demais blocos ficam iguais
+    np.testing.assert_allclose(pontos[0][:, 1:], pontos_base[0][:, 1:])
+    # Articulação passa de 26 para 52: a pontuação da atividade dobra e o ajuste de 2 pontos
+    # do BLOCO 1 é reescalado pelo novo máximo do bloco (98 / 72)
+    np.testing.assert_allclose(pontos_base[0][:, 0], [42, 53, 32, 47, 32, 47, 42.2])
+    np.testing.assert_allclose(
+        pontos[0][:, 0], [62.7222, 71.7222, 42.7222, 65.7222, 38.7222, 67.7222, 57.3222], atol=1e-4
+    )
+
+
+def test_posicoes_e_sensibilidade(matriz):
+    assert calcular_posicoes(np.array([[3.0, 1.0, 2.0]])).tolist() == [[1, 3, 2]]
+    sensibilidade = sensibilidade_ranking(matriz, np.ones(len(matriz['blocos'])), amostras=500)
+    np.testing.assert_allclose(sensibilidade['probabilidades'].sum(axis=1), 1)
+    np.testing.assert_allclose(sensibilidade['probabilidades'].sum(axis=0), 1)
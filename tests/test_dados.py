@@ -0,0 +1,99 @@
+import datetime
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+from dados import catalogo_planilha, textos_compartilhados, indice_coluna
+
+PLANILHA = Path(__file__).resolve().parent.parent / 'Matriz_Avaliativa_Ceasas.xlsx'
+
+NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+NS_R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def planilha_manual(sheet_data, textos=None):
+    """Monta um .xlsx mínimo com uma aba, para cobrir formatos que o openpyxl não gera"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as arquivo:
+        arquivo.writestr(
+            'xl/workbook.xml',
+            f'<workbook {NS} {NS_R}><sheets><sheet name="Dados" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        )
+        arquivo.writestr(
+            'xl/_rels/workbook.xml.rels',
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="/xl/worksheets/dados.xml"/></Relationships>',
+        )
+        arquivo.writestr('xl/worksheets/dados.xml', f'<worksheet {NS}><sheetData>{sheet_data}</sheetData></worksheet>')
+        if textos is not None:
+            itens = ''.join(f'<si><t>{t}</t></si>' for t in textos)
+            arquivo.writestr('xl/sharedStrings.xml', f'<sst {NS}>{itens}</sst>')
+    return buffer.getvalue()
+
+
+def test_indice_coluna():
+    assert indice_coluna('A1') == 0
+    assert indice_coluna('Z9') == 25
+    assert indice_coluna('AA10') == 26
+    assert indice_coluna('AB12') == 27
+    assert indice_coluna('XFD1048576') == 16383
+
+
+def test_catalogo_da_planilha_original():
+    catalogo = catalogo_planilha(PLANILHA.read_bytes())
+    assert list(catalogo) == ['Planilha1']
+    info = catalogo['Planilha1']
+    assert info['linhas_cabecalho'] == 2
+    assert info['linhas'] == 11
+    assert info['colunas'][:3] == ['Bloco', 'Título', 'Atividade']
+    assert 'Belem/PA pontuação' in info['colunas']
+
+
+def test_catalogo_sem_dimensao_com_datas():
+    # O openpyxl em modo write-only não grava <dimension> e usa textos inline; iso_dates grava t="d"
+    wb = Workbook(write_only=True)
+    wb.iso_dates = True
+    ws = wb.create_sheet('Planilha1')
+    ws.append(['GERAL', 'GERAL'])
+    ws.append(['Bloco', 'Atividade'])
+    ws.append(['BLOCO 1', 'Articulação'])
+    ws = wb.create_sheet('Historico')
+    ws.append(['Região', datetime.datetime(2024, 1, 1), datetime.date(2024, 2, 1), 3.5, 2])
+    ws.append(['Belem/PA', 10, 12, 1, 0])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+
+    catalogo = catalogo_planilha(buffer.getvalue())
+    assert catalogo['Planilha1'] == {'colunas': ['Bloco', 'Atividade'], 'linhas_cabecalho': 2, 'linhas': None}
+    assert catalogo['Historico'] == {
+        'colunas': ['Região', '2024-01-01T00:00:00', '2024-02-01', '3.5', '2'],
+        'linhas_cabecalho': 1,
+        'linhas': None,
+    }
+
+
+def test_catalogo_com_celulas_sem_referencia():
+    # A única aba é a matriz principal: o cabeçalho do catálogo é a segunda linha
+    conteudo = planilha_manual(
+        '<row><c t="s"><v>0</v></c></row>'
+        '<row><c t="s"><v>1</v></c><c t="inlineStr"><is><t>Nota</t></is></c><c r="E2" t="d"><v>2024-03-01</v></c>'
+        '<c t="e"><v>#N/A</v></c><c t="x"><v>?</v></c></row>'
+        '<row><c><v>1</v></c></row>',
+        textos=['GERAL', 'Região'],
+    )
+    assert catalogo_planilha(conteudo)['Dados']['colunas'] == ['Região', 'Nota', '2024-03-01', '#N/A', '?']
+
+
+@pytest.mark.parametrize('ate_indice, esperado', [(-1, []), (0, ['a']), (1, ['a', 'b'])])
+def test_textos_compartilhados_ate_o_indice(ate_indice, esperado):
+    conteudo = planilha_manual('', textos=['a', 'b', 'c'])
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as arquivo:
+        assert textos_compartilhados(arquivo, ate_indice) == esperado
+
+
+def test_textos_compartilhados_sem_tabela():
+    with zipfile.ZipFile(io.BytesIO(planilha_manual(''))) as arquivo:
+        assert textos_compartilhados(arquivo, 3) == []